@@ -3,15 +3,15 @@
 from __future__ import absolute_import
 
 import topi
-import tvm
 from . import registry as reg
 from .registry import OpPattern
+from .tensor import _cached_target
 
 # resize
 @reg.register_schedule("resize")
 def schedule_resize(_, outs, target):
     """Schedule definition of resize"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.schedule_injective(outs)
 
 reg.register_pattern("resize", OpPattern.INJECTIVE)
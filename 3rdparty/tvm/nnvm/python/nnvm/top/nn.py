@@ -2,13 +2,142 @@
 """Definition of nn ops"""
 from __future__ import absolute_import
 
+from collections import namedtuple
+
 import tvm
+from tvm.contrib import cblas
 import topi
-from topi.util import get_const_int
-from .tensor import _fschedule_broadcast, _fschedule_injective
+from topi.util import get_const_int, get_const_tuple
+from .attr_dict import AttrDict
+from .tensor import _fschedule_broadcast, _fschedule_injective, _cached_target, \
+    _current_target
 from . import registry as reg
 from .registry import OpPattern
 
+_Conv2DAttrs = namedtuple('Conv2DAttrs',
+                          ['padding', 'strides', 'dilation', 'kernel_size',
+                           'groups', 'channels', 'layout', 'use_bias'])
+
+# how each convolution attribute is read from the AttrDict
+_CONV_ATTR_GETTERS = {
+    "padding": AttrDict.get_int_tuple,
+    "strides": AttrDict.get_int_tuple,
+    "dilation": AttrDict.get_int_tuple,
+    "kernel_size": AttrDict.get_int_tuple,
+    "groups": AttrDict.get_int,
+    "channels": AttrDict.get_int,
+    "layout": AttrDict.__getitem__,
+    "use_bias": AttrDict.get_bool,
+}
+
+def _extract_conv_attrs(attrs, fields=_Conv2DAttrs._fields):
+    """Parse the attributes of a convolution node into a typed tuple.
+
+    Parameters
+    ----------
+    attrs : AttrDict
+        Attributes of the convolution node
+
+    fields : tuple of str, optional
+        Names of the attributes to read. Each one costs a call into the
+        graph, so callbacks only read what they use; the others are None.
+
+    Returns
+    -------
+    conv_attrs : Conv2DAttrs
+        Typed attribute tuple
+    """
+    values = dict.fromkeys(_Conv2DAttrs._fields)
+    for field in fields:
+        values[field] = _CONV_ATTR_GETTERS[field](attrs, field)
+    return _Conv2DAttrs(**values)
+
+
+def _target_has_lib(lib, target_name=None):
+    """Whether the current target enables the given library via -libs.
+
+    With target_name, only targets of that name count.
+    """
+    target = _current_target()
+    return target is not None and lib in target.libs and \
+        (target_name is None or target.target_name == target_name)
+
+
+def _conv2d_as_gemm(conv_attrs, batch, dtype):
+    """Whether a conv2d is computed as a single cblas GEMM.
+
+    This is the case for float32 1x1 convs with unit stride and no padding on
+    llvm targets with -libs=cblas. In NHWC the data is a [batch * height * width,
+    in_channel] matrix, in NCHW only a single batch reshapes to a matrix.
+    """
+    return conv_attrs.groups == 1 and conv_attrs.kernel_size == (1, 1) and \
+        conv_attrs.strides == (1, 1) and conv_attrs.padding == (0, 0) and \
+        conv_attrs.dilation == (1, 1) and dtype == "float32" and \
+        (conv_attrs.layout == "NHWC" or batch == 1) and _target_has_lib("cblas", "llvm")
+
+
+# tag of the cblas extern op that computes a 1x1 conv2d
+_CONV2D_GEMM_TAG = "conv2d_gemm"
+
+def _has_conv2d_gemm(outs):
+    """Whether the conv2d in a fused group was computed by _compute_conv2d_gemm.
+
+    The fused outputs may have another dtype than the conv2d, e.g. after a
+    cast, so the extern op is looked up instead of repeating the check.
+    """
+    ops = [out.op for out in outs]
+    while ops:
+        op = ops.pop()
+        if op.tag == _CONV2D_GEMM_TAG:
+            return True
+        ops.extend(tensor.op for tensor in op.input_tensors)
+    return False
+
+
+def _compute_conv2d_gemm(data, kernel, layout):
+    """Compute a 1x1 conv2d as a cblas matrix multiplication.
+
+    The extern op binds its inputs and output as 2-D buffers, which cannot
+    view the 4-D tensors, and the extern schedule on llvm inlines nothing. The
+    reshapes of the data and the output are therefore copies. They are linear
+    in the tensor sizes, while the GEMM does in_channel multiply-adds per
+    output element, so the copies only dominate for very few channels.
+    """
+    if layout == "NHWC":
+        batch, height, width, in_channel = get_const_tuple(data.shape)
+        out_channel = get_const_int(kernel.shape[3])
+        data = topi.reshape(data, (batch * height * width, in_channel))
+        kernel = topi.reshape(kernel, (in_channel, out_channel))
+        with tvm.tag_scope(_CONV2D_GEMM_TAG):
+            out = cblas.matmul(data, kernel)
+        return topi.reshape(out, (batch, height, width, out_channel))
+    # NCHW with batch 1
+    batch, in_channel, height, width = get_const_tuple(data.shape)
+    out_channel = get_const_int(kernel.shape[0])
+    data = topi.reshape(data, (in_channel, height * width))
+    kernel = topi.reshape(kernel, (out_channel, in_channel))
+    with tvm.tag_scope(_CONV2D_GEMM_TAG):
+        out = cblas.matmul(kernel, data)
+    return topi.reshape(out, (batch, out_channel, height, width))
+
+
+def _bias_adder(axis):
+    """Make the bias add of a convolution output with channels on the given axis.
+
+    The bias is indexed directly in a broadcast stage, so conv schedules
+    inline it into the output stage without a rank expanding stage in between.
+    """
+    def _add_bias(conv, bias):
+        return tvm.compute(conv.shape,
+                           lambda *idx: conv(*idx) + bias[idx[axis]],
+                           name="conv_bias", tag=topi.tag.BROADCAST)
+    return _add_bias
+
+# layouts supported by conv2d and the bias add of each
+_CONV_LAYOUTS = frozenset(("NCHW", "NHWC"))
+_BIAS_ADDERS = {"NCHW": _bias_adder(1), "NHWC": _bias_adder(3)}
+
+
 # relu
 reg.register_schedule("relu", _fschedule_broadcast)
 reg.register_pattern("relu", OpPattern.ELEMWISE)
@@ -37,22 +166,47 @@ reg.register_schedule("__layout_transform__", _fschedule_injective)
 reg.register_pattern("__layout_transform__", OpPattern.INJECTIVE)
 
 
-@reg.register_schedule("softmax")
-def schedule_softmax(_, outs, target):
-    """Schedule definition of softmax"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_softmax(outs)
+def _make_schedule(fschedule):
+    """Wrap a generic topi schedule into a schedule function of nnvm"""
+    def _schedule(_, outs, target):
+        with _cached_target(target):
+            return fschedule(outs)
+    return _schedule
+
+# ops that are scheduled by a generic topi schedule without extra arguments
+_GENERIC_SCHEDULES = [
+    ("softmax", topi.generic.schedule_softmax),
+    ("log_softmax", topi.generic.schedule_softmax),
+    ("dense", topi.generic.schedule_dense),
+    ("conv2d_transpose", topi.generic.schedule_conv2d_transpose_nchw),
+    ("max_pool2d", topi.generic.schedule_pool),
+    ("avg_pool2d", topi.generic.schedule_pool),
+    ("global_max_pool2d", topi.generic.schedule_global_pool),
+    ("global_avg_pool2d", topi.generic.schedule_global_pool),
+    ("upsampling", topi.generic.schedule_injective),
+    ("lrn", topi.generic.schedule_lrn),
+    ("l2_normalize", topi.generic.schedule_l2_normalize),
+]
+
+for _op_name, _fschedule in _GENERIC_SCHEDULES:
+    reg.register_schedule(_op_name, _make_schedule(_fschedule))
+
+
+# softmax
+@reg.register_compute("softmax", level=11)
+def compute_softmax(attrs, inputs, _):
+    """Compute definition of softmax"""
+    axis = attrs.get_int("axis")
+    # -libs=fast_math trades a little accuracy for a vectorizable exp,
+    # whose reinterpret intrinsic only llvm lowers
+    if inputs[0].dtype == "float32" and _target_has_lib("fast_math", "llvm"):
+        return topi.nn.fast_softmax(inputs[0], axis=axis)
+    return topi.nn.softmax(inputs[0], axis=axis)
 
 reg.register_pattern("softmax", OpPattern.OPAQUE)
 
 
 # log softmax
-@reg.register_schedule("log_softmax")
-def schedule_log_softmax(_, outs, target):
-    """Schedule definition of softmax"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_softmax(outs)
-
 # Mark softmax as extern as we do not fuse it in call cases
 reg.register_pattern("log_softmax", OpPattern.OPAQUE)
 
@@ -61,15 +215,8 @@ reg.register_pattern("log_softmax", OpPattern.OPAQUE)
 @reg.register_compute("dense")
 def compute_dense(attrs, inputs, _):
     """Compute definition of dense"""
-    if attrs.get_bool("use_bias"):
-        return topi.nn.dense(inputs[0], inputs[1], bias=inputs[2])
-    return topi.nn.dense(inputs[0], inputs[1])
-
-@reg.register_schedule("dense")
-def schedule_dense(_, outs, target):
-    """Schedule definition of dense"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_dense(outs)
+    # bias is present in inputs exactly when use_bias is set
+    return topi.nn.dense(*inputs)
 
 reg.register_pattern("dense", OpPattern.OUT_ELEMWISE_FUSABLE)
 
@@ -78,64 +225,76 @@ reg.register_pattern("dense", OpPattern.OUT_ELEMWISE_FUSABLE)
 @reg.register_compute("conv2d")
 def compute_conv2d(attrs, inputs, _):
     """Compute definition of conv2d"""
-    padding = attrs.get_int_tuple("padding")
-    strides = attrs.get_int_tuple("strides")
-    dilation = attrs.get_int_tuple("dilation")
-    groups = attrs.get_int("groups")
-    channels = attrs.get_int("channels")
-    layout = attrs["layout"]
-    assert layout == "NCHW" or layout == "NHWC"
-    (dilation_h, dilation_w) = dilation
-    if dilation_h < 1 or dilation_w < 1:
+    conv_attrs = _extract_conv_attrs(attrs)
+    padding = conv_attrs.padding
+    strides = conv_attrs.strides
+    dilation = conv_attrs.dilation
+    groups = conv_attrs.groups
+    channels = conv_attrs.channels
+    layout = conv_attrs.layout
+    assert layout in _CONV_LAYOUTS
+    # check the common non-dilated case first
+    if dilation != (1, 1) and (dilation[0] < 1 or dilation[1] < 1):
         raise ValueError("dilation should be positive value")
-    elif dilation == (1, 1):
-        kernel = inputs[1]
-    elif layout == "NCHW":
-        kernel = topi.nn.dilate(inputs[1], [1, 1, dilation_h, dilation_w])
-    else: #layout == NHWC
-        kernel = topi.nn.dilate(inputs[1], [1, dilation_h, dilation_w, 1])
 
-    if groups == 1:
-        out = topi.nn.conv2d(inputs[0], kernel, strides, padding, layout)
-    elif groups == get_const_int(inputs[0].shape[1]) and groups == channels:
-        out = topi.nn.depthwise_conv2d_nchw(inputs[0], kernel, strides, padding)
+    if _conv2d_as_gemm(conv_attrs, get_const_int(inputs[0].shape[0]), inputs[0].dtype):
+        out = _compute_conv2d_gemm(inputs[0], inputs[1], layout)
+    elif groups == 1:
+        # the target's conv2d declaration picks the algorithm, e.g. winograd
+        # for 3x3 stride 1 kernels on mali, and how the kernel is dilated
+        out = topi.nn.conv2d(inputs[0], inputs[1], strides, padding, layout,
+                             dilation=dilation)
+    elif layout == "NCHW" and \
+         groups == get_const_int(inputs[0].shape[1]) and groups == channels:
+        out = topi.nn.depthwise_conv2d_nchw(inputs[0], inputs[1], strides, padding,
+                                            dilation=dilation)
+    elif layout == "NHWC" and \
+         groups == get_const_int(inputs[0].shape[3]) and groups == channels:
+        out = topi.nn.depthwise_conv2d_nhwc(inputs[0], inputs[1], strides, padding,
+                                            dilation=dilation)
     else:
         raise ValueError("not support arbitrary group number for now")
-    if attrs.get_bool("use_bias"):
-        bias = inputs[2]
-        expand_axis = 1 if layout == "NCHW" else 0
-        bias = topi.expand_dims(bias, axis=expand_axis, num_newaxis=2)
-        out = topi.broadcast_add(out, bias)
+    if conv_attrs.use_bias:
+        out = _BIAS_ADDERS[layout](out, inputs[2])
     return out
 
+# conv2d schedules keyed on (groups == 1, layout)
+_CONV2D_SCHED_FN = {
+    (True, "NCHW"): topi.generic.schedule_conv2d_nchw,
+    (True, "NHWC"): topi.generic.schedule_conv2d_nhwc,
+    (False, "NCHW"): topi.generic.schedule_depthwise_conv2d_nchw,
+    (False, "NHWC"): topi.generic.schedule_depthwise_conv2d_nhwc,
+}
+
 @reg.register_schedule("conv2d")
 def schedule_conv2d(attrs, outs, target):
     """Schedule definition of conv2d"""
-    groups = attrs.get_int("groups")
-    layout = attrs["layout"]
-    with tvm.target.create(target):
-        if groups == 1 and layout == "NCHW":
-            return topi.generic.schedule_conv2d_nchw(outs)
-        elif groups == 1 and layout == "NHWC":
-            return topi.generic.schedule_conv2d_nhwc(outs)
-        return topi.generic.schedule_depthwise_conv2d_nchw(outs)
+    conv_attrs = _extract_conv_attrs(attrs, ("groups", "layout"))
+    with _cached_target(target):
+        if _has_conv2d_gemm(outs):
+            return topi.generic.schedule_extern(outs)
+        return _CONV2D_SCHED_FN[(conv_attrs.groups == 1, conv_attrs.layout)](outs)
 
 @reg.register_alter_op_layout("conv2d")
 def alter_conv2d_layout(attrs, inputs, tinfos):
     return topi.nn.conv2d_alter_layout(attrs, inputs, tinfos)
 
+# bias is added in a broadcast stage on the conv output, so the conv schedules
+# inline it together with the elemwise ops fused after conv2d
 reg.register_pattern("conv2d", OpPattern.OUT_ELEMWISE_FUSABLE)
 
 # convolution NCHWc
 @reg.register_compute("_contrib_conv2d_NCHWc")
 def compute_contrib_conv2d_NCHWc(attrs, inputs, _):
     """Compute definition of conv2d NCHWc"""
-    padding = attrs.get_int_tuple("padding")
-    strides = attrs.get_int_tuple("strides")
-    dilation = attrs.get_int_tuple("dilation")
-    kh, kw = attrs.get_int_tuple('kernel_size')
-    groups = attrs.get_int("groups")
-    channels = attrs.get_int("channels")
+    conv_attrs = _extract_conv_attrs(attrs, ("padding", "strides", "dilation", "kernel_size",
+                                             "groups", "channels", "use_bias"))
+    padding = conv_attrs.padding
+    strides = conv_attrs.strides
+    dilation = conv_attrs.dilation
+    kh, kw = conv_attrs.kernel_size
+    groups = conv_attrs.groups
+    channels = conv_attrs.channels
     assert dilation == (1, 1), "not support dilate now"
     if groups == 1:
         # pylint: disable=assignment-from-no-return
@@ -143,21 +302,25 @@ def compute_contrib_conv2d_NCHWc(attrs, inputs, _):
         # pylint: enable=assignment-from-no-return
     else:
         raise ValueError("not support arbitrary group number > 1 for now")
-    if attrs.get_bool("use_bias"):
-        bias = inputs[2]
-        bias = topi.expand_dims(bias, axis=1, num_newaxis=2)
-        out = topi.broadcast_add(out, bias)
+    if conv_attrs.use_bias:
+        # bias is packed as [out_channel_chunk, out_channel_block]
+        conv, bias = out, inputs[2]
+        out = tvm.compute(conv.shape,
+                          lambda n, c, h, w, cb: conv[n, c, h, w, cb] + bias[c, cb],
+                          name="conv_bias", tag=topi.tag.BROADCAST)
     return out
 
 @reg.register_schedule("_contrib_conv2d_NCHWc")
 def schedule_contrib_conv2d_NCHWc(attrs, outs, target):
     """Schedule definition of conv2d NCHWc"""
-    groups = attrs.get_int("groups")
-    kh, kw = attrs.get_int_tuple('kernel_size')
-    oc = attrs.get_int("channels")
-    padding = attrs.get_int_tuple("padding")
-    strides = attrs.get_int_tuple("strides")
-    with tvm.target.create(target):
+    conv_attrs = _extract_conv_attrs(attrs, ("groups", "kernel_size", "channels",
+                                             "padding", "strides"))
+    groups = conv_attrs.groups
+    kh, kw = conv_attrs.kernel_size
+    oc = conv_attrs.channels
+    padding = conv_attrs.padding
+    strides = conv_attrs.strides
+    with _cached_target(target):
         if groups == 1:
             return topi.generic.schedule_conv2d_NCHWc(oc, (kh, kw), strides, padding, outs)
         else:
@@ -169,79 +332,56 @@ reg.register_pattern("_contrib_conv2d_NCHWc", OpPattern.OUT_ELEMWISE_FUSABLE)
 @reg.register_compute("conv2d_transpose")
 def compute_conv2d_transpose(attrs, inputs, _):
     """Compute definition of conv2d_transpose"""
-    padding = attrs.get_int_tuple("padding")
-    strides = attrs.get_int_tuple("strides")
-    dilation = attrs.get_int_tuple("dilation")
-    groups = attrs.get_int("groups")
-    layout = attrs["layout"]
+    conv_attrs = _extract_conv_attrs(attrs, ("padding", "strides", "dilation", "groups",
+                                             "layout", "use_bias"))
+    padding = conv_attrs.padding
+    strides = conv_attrs.strides
+    dilation = conv_attrs.dilation
+    groups = conv_attrs.groups
+    layout = conv_attrs.layout
     assert layout == "NCHW", "only support nchw for now"
     assert dilation == (1, 1), "not support dilate now"
     assert groups == 1, "only support groups == 1 for now"
     out = topi.nn.conv2d_transpose_nchw(inputs[0], inputs[1], strides, padding)
-    if attrs.get_bool("use_bias"):
-        bias = inputs[2]
-        bias = topi.expand_dims(bias, axis=1, num_newaxis=2)
-        out = topi.broadcast_add(out, bias)
     output_padding = attrs.get_int_tuple("output_padding")
-    out = topi.nn.pad(out, \
-        [0, 0, 0, 0], [0, 0, output_padding[0], output_padding[1]])
+    if output_padding != (0, 0):
+        # bias add and output padding are done in one stage instead of a separate pad
+        conv = out
+        bias = inputs[2] if conv_attrs.use_bias else None
+        batch, out_c, out_h, out_w = conv.shape
+        oshape = (batch, out_c,
+                  tvm.ir_pass.Simplify(out_h + output_padding[0]),
+                  tvm.ir_pass.Simplify(out_w + output_padding[1]))
+        def _pad_output(n, c, h, w):
+            value = conv[n, c, h, w]
+            if bias is not None:
+                value = value + bias[c]
+            return tvm.select(tvm.all(h < out_h, w < out_w), value, tvm.const(0, conv.dtype))
+        out = tvm.compute(oshape, _pad_output, name="conv_pad",
+                          tag=topi.tag.INJECTIVE + ",pad")
+    elif conv_attrs.use_bias:
+        out = _BIAS_ADDERS["NCHW"](out, inputs[2])
     return out
 
-@reg.register_schedule("conv2d_transpose")
-def schedule_conv2d_transpose(attrs, outs, target):
-    """Schedule definition of conv2d_transpose"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_conv2d_transpose_nchw(outs)
-
 reg.register_pattern("conv2d_transpose", OpPattern.OUT_ELEMWISE_FUSABLE)
 
 
 # max_pool2d
-@reg.register_schedule("max_pool2d")
-def schedule_max_pool2d(_, outs, target):
-    """Schedule definition of max_pool2d"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_pool(outs)
-
 reg.register_pattern("max_pool2d", OpPattern.OUT_ELEMWISE_FUSABLE)
 
 
 # avg_pool2d
-@reg.register_schedule("avg_pool2d")
-def schedule_avg_pool2d(_, outs, target):
-    """Schedule definition of avg_pool2d"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_pool(outs)
-
 reg.register_pattern("avg_pool2d", OpPattern.OUT_ELEMWISE_FUSABLE)
 
 
 # global_max_pool2d
-@reg.register_schedule("global_max_pool2d")
-def schedule_global_max_pool2d(_, outs, target):
-    """Schedule definition of global_max_pool2d"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_global_pool(outs)
-
 reg.register_pattern("global_max_pool2d", OpPattern.OUT_ELEMWISE_FUSABLE)
 
 
 # global_avg_pool2d
-@reg.register_schedule("global_avg_pool2d")
-def schedule_global_avg_pool2d(_, outs, target):
-    """Schedule definition of global_avg_pool2d"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_global_pool(outs)
-
 reg.register_pattern("global_avg_pool2d", OpPattern.OUT_ELEMWISE_FUSABLE)
 
 # upsampling
-@reg.register_schedule("upsampling")
-def schedule_upsampling(_, outs, target):
-    """Schedule definition of upsampling"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_injective(outs)
-
 reg.register_pattern("upsampling", OpPattern.INJECTIVE)
 
 @reg.register_compute("lrn")
@@ -254,12 +394,6 @@ def compute_lrn(attrs, inputs, _):
     bias = attrs.get_float("bias")
     return topi.nn.lrn(inputs[0], size, axis, alpha, beta, bias)
 
-@reg.register_schedule("lrn")
-def schedule_lrn(attrs, outs, target):
-    """Schedule definition of lrn"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_lrn(outs)
-
 reg.register_pattern("lrn", OpPattern.OPAQUE)
 
 @reg.register_compute("l2_normalize")
@@ -269,10 +403,4 @@ def compute_l2_normalize(attrs, inputs, _):
     axis = attrs.get_int_tuple("axis")
     return topi.nn.l2_normalize(inputs[0], eps, axis)
 
-@reg.register_schedule("l2_normalize")
-def schedule_l2_normalize(attrs, outs, target):
-    """Schedule definition of l2 normalize"""
-    with tvm.target.create(target):
-        return topi.generic.schedule_l2_normalize(outs)
-
 reg.register_pattern("l2_normalize", OpPattern.OUT_ELEMWISE_FUSABLE)
@@ -7,10 +7,11 @@ import topi
 import topi.cuda
 from . import registry as reg
 from .registry import OpPattern
+from .tensor import _cached_target
 
 def _schedule_reduce(_, outs, target):
     """Generic schedule for reduce"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.schedule_reduce(outs)
 
 
@@ -8,9 +8,43 @@ import topi.cuda
 from . import registry as reg
 from .registry import OpPattern
 
+# parsed targets, keyed by target string
+_TARGET_CACHE = {}
+
+def _cached_target(target):
+    """Get the target object of a target string, parsing each string only once.
+
+    Parameters
+    ----------
+    target : str or tvm.target.Target
+        The target
+
+    Returns
+    -------
+    target : tvm.target.Target
+        The target object
+    """
+    if isinstance(target, tvm.target.Target):
+        return target
+    tgt = _TARGET_CACHE.get(target)
+    if tgt is None:
+        tgt = tvm.target.create(target)
+        _TARGET_CACHE[target] = tgt
+    return tgt
+
+def _current_target():
+    """Get the current target object, or None outside of a target scope.
+
+    Unlike tvm.target.current_target, this reuses the parse of the target
+    string through _cached_target.
+    """
+    # pylint: disable=protected-access
+    target = tvm.target._api_internal._GetCurrentTarget(True)
+    return _cached_target(target) if target is not None else None
+
 def _schedule_injective(_, outs, target):
     """Generic schedule for binary bcast"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.schedule_injective(outs)
 
 def _compute_binary_scalar(f):
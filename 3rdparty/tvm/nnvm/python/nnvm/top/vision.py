@@ -2,10 +2,10 @@
 """Definition of nn ops"""
 from __future__ import absolute_import
 
-import tvm
 import topi
 from . import registry as reg
 from .registry import OpPattern
+from .tensor import _cached_target
 
 @reg.register_compute("yolo2_reorg")
 def compute_reorg(attrs, inputs, _):
@@ -15,7 +15,7 @@ def compute_reorg(attrs, inputs, _):
 @reg.register_schedule("yolo2_reorg")
 def schedule_reorg(attrs, outs, target):
     """Schedule definition of reorg"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.schedule_injective(outs)
 
 reg.register_pattern("yolo2_reorg", OpPattern.INJECTIVE)
@@ -33,7 +33,7 @@ def compute_region(attrs, inputs, _):
 @reg.register_schedule("yolo2_region")
 def schedule_region(attrs, outs, target):
     """Schedule definition of region"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.vision.schedule_region(outs)
 
 reg.register_pattern("yolo2_region", OpPattern.OPAQUE)
@@ -42,7 +42,7 @@ reg.register_pattern("yolo2_region", OpPattern.OPAQUE)
 @reg.register_schedule("multibox_prior")
 def schedule_multibox_prior(_, outs, target):
     """Schedule definition of multibox_prior"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.schedule_multibox_prior(outs)
 
 @reg.register_compute("multibox_prior")
@@ -63,7 +63,7 @@ reg.register_pattern("multibox_prior", OpPattern.OPAQUE)
 @reg.register_schedule("multibox_transform_loc")
 def schedule_multibox_transform_loc(_, outs, target):
     """Schedule definition of multibox_detection"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.schedule_multibox_transform_loc(outs)
 
 @reg.register_compute("multibox_transform_loc")
@@ -82,7 +82,7 @@ reg.register_pattern("multibox_detection", OpPattern.OPAQUE)
 @reg.register_schedule("nms")
 def schedule_nms(_, outs, target):
     """Schedule definition of nms"""
-    with tvm.target.create(target):
+    with _cached_target(target):
         return topi.generic.schedule_nms(outs)
 
 @reg.register_compute("nms")
@@ -219,6 +219,22 @@ def test_softmax():
     helper(y, inputs, dtype, forward, backward)
 
 
+def test_softmax_fast_math():
+    # -libs=fast_math switches softmax to topi.nn.fast_softmax on llvm
+    x = sym.Variable("x")
+    y = sym.softmax(x)
+    dtype = "float32"
+    dshape = (10, 1000)
+    for target in ["llvm -libs=fast_math", "llvm"]:
+        graph, lib, _ = nnvm.compiler.build(y, target, {"x": dshape})
+        m = graph_runtime.create(graph, lib, tvm.cpu(0))
+        data = np.random.uniform(-10, 10, size=dshape).astype(dtype)
+        m.run(x=data)
+        out = m.get_output(0, tvm.nd.empty(dshape, dtype))
+        np.testing.assert_allclose(out.asnumpy(), topi.testing.softmax_python(data),
+                                   rtol=1e-5, atol=1e-5)
+
+
 def test_log_softmax():
     x = sym.Variable("x")
     y = sym.log_softmax(x)
@@ -440,6 +456,7 @@ if __name__ == "__main__":
     test_tanh()
     test_sigmoid()
     test_softmax()
+    test_softmax_fast_math()
     test_squeeze()
     test_pad()
     test_lrn()
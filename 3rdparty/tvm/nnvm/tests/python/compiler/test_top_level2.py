@@ -58,6 +58,150 @@ def test_dilated_conv2d():
         np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
 
 
+def test_dilated_conv2d_opt_level3():
+    # the layout alteration at opt_level 3 must keep dilated convs in NCHW,
+    # as conv2d_NCHWc does not support dilation
+    dilation = 2
+    x = sym.Variable("x")
+    y = sym.conv2d(x, channels=16, kernel_size=(3, 3), dilation=(dilation, dilation),
+                   name="y", padding=(2, 2))
+    dtype = "float32"
+    dshape = (1, 16, 18, 18)
+    kshape = (16, 16, 3, 3)
+    oshape = (1, 16, 18, 18)
+    shape_dict = {"x": dshape}
+    target, ctx = "llvm", tvm.cpu(0)
+    with nnvm.compiler.build_config(opt_level=3):
+        graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
+    m = graph_runtime.create(graph, lib, ctx)
+    data = tvm.nd.array(np.random.uniform(size=dshape).astype(dtype))
+    bias = tvm.nd.array(np.random.uniform(size=kshape[0]).astype(dtype))
+    kernel_np = np.random.uniform(size=kshape).astype(dtype)
+    kernel = tvm.nd.array(kernel_np)
+    dkernel_np = topi.testing.dilate_python(kernel_np, (1, 1, dilation, dilation))
+    m.run(x=data, y_weight=kernel, y_bias=bias)
+    out = m.get_output(0, tvm.nd.empty(oshape, dtype))
+    c_np = topi.testing.conv2d_nchw_python(
+        data.asnumpy(), dkernel_np, 1, 2)
+    c_np = c_np + bias.asnumpy().reshape(kshape[0], 1, 1)
+    np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
+
+
+def test_dilated_conv2d_nhwc():
+    dilation = 3
+    x = sym.Variable("x")
+    y = sym.conv2d(x, channels=10, kernel_size=(3, 3), dilation=(dilation, dilation),
+                   name="y", padding=(1, 1), layout="NHWC", kernel_layout="HWIO")
+    dtype = "float32"
+    dshape = (1, 18, 18, 3)
+    kshape = (3, 3, 3, 10)
+    oshape = (1, 14, 14, 10)
+    shape_dict = {"x": dshape}
+    # NHWC conv2d is only scheduled on cpu
+    target, ctx = "llvm", tvm.cpu(0)
+    graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
+    m = graph_runtime.create(graph, lib, ctx)
+    data = tvm.nd.array(np.random.uniform(size=dshape).astype(dtype))
+    bias = tvm.nd.array(np.random.uniform(size=kshape[3]).astype(dtype))
+    kernel_np = np.random.uniform(size=kshape).astype(dtype)
+    kernel = tvm.nd.array(kernel_np)
+    dkernel_np = topi.testing.dilate_python(kernel_np, (dilation, dilation, 1, 1))
+    m.run(x=data, y_weight=kernel, y_bias=bias)
+    out = m.get_output(0, tvm.nd.empty(oshape, dtype))
+    c_np = topi.testing.conv2d_nhwc_python(
+        data.asnumpy(), dkernel_np, 1, 1)
+    c_np = c_np + bias.asnumpy().reshape(1, 1, kshape[3])
+    np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
+
+
+def verify_conv2d_1x1_cblas(layout, dshape, kshape, oshape, out_dtype="float32"):
+    if not tvm.get_global_func("tvm.contrib.cblas.matmul", True):
+        print("skip because extern function is not avalable")
+        return
+    x = sym.Variable("x")
+    if layout == "NCHW":
+        channels = kshape[0]
+        y = sym.conv2d(x, channels=channels, kernel_size=(1, 1), name="y")
+        bshape = (channels, 1, 1)
+        fref = topi.testing.conv2d_nchw_python
+    else:
+        channels = kshape[3]
+        y = sym.conv2d(x, channels=channels, kernel_size=(1, 1), name="y",
+                       layout="NHWC", kernel_layout="HWIO")
+        bshape = (1, 1, channels)
+        fref = topi.testing.conv2d_nhwc_python
+    if out_dtype != "float32":
+        # the cast is fused into the conv2d group
+        y = sym.cast(y, dtype=out_dtype)
+    dtype = "float32"
+    shape_dict = {"x": dshape}
+    # 1x1 convs are lowered to a cblas GEMM
+    target, ctx = "llvm -libs=cblas", tvm.cpu(0)
+    graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
+    m = graph_runtime.create(graph, lib, ctx)
+    data = tvm.nd.array(np.random.uniform(size=dshape).astype(dtype))
+    kernel = tvm.nd.array(np.random.uniform(size=kshape).astype(dtype))
+    bias = tvm.nd.array(np.random.uniform(size=channels).astype(dtype))
+    m.run(x=data, y_weight=kernel, y_bias=bias)
+    out = m.get_output(0, tvm.nd.empty(oshape, out_dtype))
+    c_np = fref(data.asnumpy(), kernel.asnumpy(), 1, 0)
+    c_np = (c_np + bias.asnumpy().reshape(bshape)).astype(out_dtype)
+    np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
+
+
+def test_conv2d_1x1_cblas():
+    verify_conv2d_1x1_cblas("NCHW", (1, 3, 18, 18), (10, 3, 1, 1), (1, 10, 18, 18))
+    verify_conv2d_1x1_cblas("NHWC", (2, 18, 18, 3), (1, 1, 3, 10), (2, 18, 18, 10))
+    verify_conv2d_1x1_cblas("NHWC", (2, 18, 18, 3), (1, 1, 3, 10), (2, 18, 18, 10),
+                            out_dtype="float64")
+
+
+def verify_conv2d_NCHWc_packing(kernel_size, padding, block):
+    # the AVX schedule table packs these resnet workloads by the vector length,
+    # the packing of the graph must take precedence over it
+    in_channel, out_channel, height, width = 64, 64, 56, 56
+    kh, kw = kernel_size
+    x = sym.Variable("x")
+    if kernel_size == (1, 1):
+        kernel_layout = "OI%di%doHW" % (block, block)
+    else:
+        kernel_layout = "OIHW%di%do" % (block, block)
+    y = sym.contrib.conv2d_NCHWc(x, channels=out_channel, kernel_size=kernel_size,
+                                 padding=(padding, padding), use_bias=False, name="y",
+                                 layout="NCHW%dc" % block, out_layout="NCHW%dc" % block,
+                                 kernel_layout=kernel_layout)
+    dtype = "float32"
+    dshape = (1, in_channel // block, height, width, block)
+    oshape = (1, out_channel // block, height, width, block)
+    shape_dict = {"x": dshape}
+    target, ctx = "llvm", tvm.cpu(0)
+    graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
+    m = graph_runtime.create(graph, lib, ctx)
+    data_np = np.random.uniform(size=(1, in_channel, height, width)).astype(dtype)
+    kernel_np = np.random.uniform(size=(out_channel, in_channel, kh, kw)).astype(dtype)
+    # NCHW -> NCHW[x]c
+    data_packed = data_np.reshape(1, in_channel // block, block, height, width) \
+                         .transpose(0, 1, 3, 4, 2)
+    # OIHW -> (OC, IC, ic, oc, h, w) for 1x1, (OC, IC, h, w, ic, oc) otherwise
+    kernel_packed = kernel_np.reshape(out_channel // block, block,
+                                      in_channel // block, block, kh, kw)
+    if kernel_size == (1, 1):
+        kernel_packed = kernel_packed.transpose(0, 2, 3, 1, 4, 5)
+    else:
+        kernel_packed = kernel_packed.transpose(0, 2, 4, 5, 3, 1)
+    m.run(x=tvm.nd.array(np.ascontiguousarray(data_packed)),
+          y_weight=tvm.nd.array(np.ascontiguousarray(kernel_packed)))
+    out = m.get_output(0, tvm.nd.empty(oshape, dtype))
+    out_np = out.asnumpy().transpose(0, 1, 4, 2, 3).reshape(1, out_channel, height, width)
+    c_np = topi.testing.conv2d_nchw_python(data_np, kernel_np, 1, padding)
+    np.testing.assert_allclose(out_np, c_np, rtol=1e-4)
+
+
+def test_conv2d_NCHWc_packing():
+    verify_conv2d_NCHWc_packing((3, 3), 1, 4)
+    verify_conv2d_NCHWc_packing((1, 1), 0, 4)
+
+
 def test_grouped_conv2d():
     x = sym.Variable("x")
     y = sym.conv2d(x, channels=32, kernel_size=(3,3), groups=32,
@@ -81,14 +225,90 @@ def test_grouped_conv2d():
         np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
 
 
-def test_conv2d_transpose():
+def test_grouped_conv2d_nhwc():
+    x = sym.Variable("x")
+    y = sym.conv2d(x, channels=32, kernel_size=(3,3), groups=32,
+                   name="y", padding=(1,1), layout="NHWC", kernel_layout='HWOI')
+    dtype = "float32"
+    dshape = (1, 18, 18, 32)
+    kshape = (3, 3, 32, 1)
+    oshape = (1, 18, 18, 32)
+    shape_dict = {"x": dshape}
+    for target, ctx in ctx_list():
+        graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
+        m = graph_runtime.create(graph, lib, ctx)
+        data = tvm.nd.array(np.random.uniform(size=dshape).astype(dtype))
+        kernel = tvm.nd.array(np.random.uniform(size=kshape).astype(dtype))
+        bias = tvm.nd.array(np.random.uniform(size=kshape[2]).astype(dtype))
+        m.run(x=data, y_weight=kernel, y_bias=bias)
+        out = m.get_output(0, tvm.nd.empty(oshape, dtype))
+        c_np = topi.testing.depthwise_conv2d_python_nhwc(
+            data.asnumpy(), kernel.asnumpy(), (1,1), 'SAME')
+        c_np = c_np + bias.asnumpy().reshape(1, 1, kshape[2])
+        np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
+
+
+def test_dilated_grouped_conv2d():
+    dilation = 2
+    x = sym.Variable("x")
+    y = sym.conv2d(x, channels=32, kernel_size=(3,3), groups=32,
+                   dilation=(dilation, dilation), name="y", padding=(2,2))
+    dtype = "float32"
+    dshape = (1, 32, 18, 18)
+    kshape = (32, 1, 3, 3)
+    oshape = (1, 32, 18, 18)
+    shape_dict = {"x": dshape}
+    for target, ctx in ctx_list():
+        graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
+        m = graph_runtime.create(graph, lib, ctx)
+        data = tvm.nd.array(np.random.uniform(size=dshape).astype(dtype))
+        kernel_np = np.random.uniform(size=kshape).astype(dtype)
+        kernel = tvm.nd.array(kernel_np)
+        dkernel_np = topi.testing.dilate_python(kernel_np, (1, 1, dilation, dilation))
+        bias = tvm.nd.array(np.random.uniform(size=kshape[0]).astype(dtype))
+        m.run(x=data, y_weight=kernel, y_bias=bias)
+        out = m.get_output(0, tvm.nd.empty(oshape, dtype))
+        c_np = topi.testing.depthwise_conv2d_python_nchw(
+            data.asnumpy(), dkernel_np, (1,1), 'SAME')
+        c_np = c_np + bias.asnumpy().reshape(kshape[0], 1, 1)
+        np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
+
+
+def test_dilated_grouped_conv2d_nhwc():
+    dilation = 2
+    x = sym.Variable("x")
+    y = sym.conv2d(x, channels=32, kernel_size=(3,3), groups=32,
+                   dilation=(dilation, dilation), name="y", padding=(2,2),
+                   layout="NHWC", kernel_layout='HWOI')
+    dtype = "float32"
+    dshape = (1, 18, 18, 32)
+    kshape = (3, 3, 32, 1)
+    oshape = (1, 18, 18, 32)
+    shape_dict = {"x": dshape}
+    for target, ctx in ctx_list():
+        graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
+        m = graph_runtime.create(graph, lib, ctx)
+        data = tvm.nd.array(np.random.uniform(size=dshape).astype(dtype))
+        kernel_np = np.random.uniform(size=kshape).astype(dtype)
+        kernel = tvm.nd.array(kernel_np)
+        dkernel_np = topi.testing.dilate_python(kernel_np, (dilation, dilation, 1, 1))
+        bias = tvm.nd.array(np.random.uniform(size=kshape[2]).astype(dtype))
+        m.run(x=data, y_weight=kernel, y_bias=bias)
+        out = m.get_output(0, tvm.nd.empty(oshape, dtype))
+        c_np = topi.testing.depthwise_conv2d_python_nhwc(
+            data.asnumpy(), dkernel_np, (1,1), 'SAME')
+        c_np = c_np + bias.asnumpy().reshape(1, 1, kshape[2])
+        np.testing.assert_allclose(out.asnumpy(), c_np, rtol=1e-5)
+
+
+def verify_conv2d_transpose(output_padding):
     x = sym.Variable("x")
     y = sym.conv2d_transpose(x, channels=10, kernel_size=(3,3), strides=(2,2),
-                             name="y", padding=(1,1), output_padding=(2,2))
+                             name="y", padding=(1,1), output_padding=output_padding)
     dtype = "float32"
     dshape = (1, 3, 18, 18)
     kshape = (3, 10, 3, 3)
-    oshape = (1, 10, 37, 37)
+    oshape = (1, 10, 35 + output_padding[0], 35 + output_padding[1])
     shape_dict = {"x": dshape}
     for target, ctx in ctx_list():
         graph, lib, _ = nnvm.compiler.build(y, target, shape_dict)
@@ -106,6 +326,11 @@ def test_conv2d_transpose():
         np.testing.assert_allclose(out.asnumpy(), d_np, rtol=1e-5)
 
 
+def test_conv2d_transpose():
+    verify_conv2d_transpose((2, 2))
+    verify_conv2d_transpose((0, 0))
+
+
 def test_max_pool2d():
     x = sym.Variable("x")
     y = sym.max_pool2d(x, pool_size=(2,2), strides=(2,2),
@@ -269,7 +494,14 @@ def test_resize_bilinear():
 if __name__ == "__main__":
     test_conv2d()
     test_dilated_conv2d()
+    test_dilated_conv2d_opt_level3()
+    test_dilated_conv2d_nhwc()
+    test_conv2d_1x1_cblas()
+    test_conv2d_NCHWc_packing()
     test_grouped_conv2d()
+    test_grouped_conv2d_nhwc()
+    test_dilated_grouped_conv2d()
+    test_dilated_grouped_conv2d_nhwc()
     test_conv2d_transpose()
     test_max_pool2d()
     test_avg_pool2d()
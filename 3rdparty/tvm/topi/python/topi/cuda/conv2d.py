@@ -3,11 +3,11 @@
 import tvm
 from tvm.contrib import cudnn
 import topi
-from ..nn.conv2d import conv2d
+from ..nn.conv2d import conv2d, _dilate_kernel
 from ..util import get_const_int
 
 @conv2d.register("cuda")
-def conv2d_cuda(data, kernel, stride, padding, layout='NCHW', out_dtype='float32'):
+def conv2d_cuda(data, kernel, stride, padding, layout='NCHW', out_dtype='float32', dilation=1):
     """Conv2D operator for cuda backend.
 
     Parameters
@@ -27,6 +27,9 @@ def conv2d_cuda(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
     layout : str
         layout of data
 
+    dilation : int or a list/tuple of two ints
+        dilation size, or [dilation_height, dilation_width]
+
     Returns
     -------
     output : tvm.Tensor
@@ -42,9 +45,13 @@ def conv2d_cuda(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
     else:
         pad_h, pad_w = padding
     # handle dilation
-    dilation_h = dilation_w = 1
+    if isinstance(dilation, int):
+        dilation_h = dilation_w = dilation
+    else:
+        dilation_h, dilation_w = dilation
     kernel_tvm = kernel
     kernel_cudnn = kernel
+    # a kernel dilated by the caller carries the dilation in its dilate stage
     if isinstance(kernel.op, tvm.tensor.ComputeOp) and "dilate" in kernel.op.tag:
         kernel_before_dilation = kernel.op.input_tensors[0]
         kernel_cudnn = kernel_before_dilation
@@ -76,8 +83,11 @@ def conv2d_cuda(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
                                     tensor_format=tensor_format,
                                     algo=-1) # let CUDNN choose the best algo
     elif layout == 'NCHW':
-        return topi.nn.conv2d_nchw(data, kernel_tvm, stride, padding, out_dtype)
+        return topi.nn.conv2d_nchw(data, kernel_tvm, stride, padding, out_dtype,
+                                   dilation=dilation)
     elif layout == 'HWCN':
+        kernel_tvm = _dilate_kernel(kernel_tvm, dilation, layout)
         return topi.nn.conv2d_hwcn(data, kernel_tvm, stride, padding, out_dtype)
     else:
         raise ValueError("not support this layout {} yet".format(layout))
+
@@ -9,7 +9,8 @@ from .. import generic
 from .. import util
 from .. import tag
 from ..nn import pad
-from ..nn.conv2d import conv2d, conv2d_NCHWc, conv2d_alter_layout, _get_workload
+from ..nn.conv2d import conv2d, conv2d_NCHWc, conv2d_alter_layout, _get_workload, \
+                         _dilate_kernel
 from ..nn.util import get_pad_tuple
 from ..util import simplify
 
@@ -309,7 +310,7 @@ def _schedule_cl_spatialpack_NCHWc(s, op):
 
 
 @conv2d.register(["intel_graphics"])
-def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32'):
+def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32', dilation=1):
     """Conv2D operator for Intel Graphics backend.
 
     Parameters
@@ -324,6 +325,8 @@ def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
         padding size, or [pad_height, pad_width]
     layout : str
         layout of data
+    dilation : int or a list/tuple of two ints
+        dilation size, or [dilation_height, dilation_width]
     Returns
     -------
     output : tvm.Tensor
@@ -333,6 +336,8 @@ def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
     assert data.shape[0].value == 1, "only support batch size=1 convolution on intel gpu"
     assert data.dtype == kernel.dtype, "Do not support inputs with different data types now."
 
+    # the spatial pack template takes no dilation, so dilate the kernel beforehand
+    kernel = _dilate_kernel(kernel, dilation, layout)
     out_dtype = data.dtype
     HPAD, WPAD, _, _ = get_pad_tuple(padding, kernel)
     kernel_shape = util.get_const_tuple(kernel.shape)
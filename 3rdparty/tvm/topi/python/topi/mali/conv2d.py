@@ -10,7 +10,7 @@ from .. import generic
 from .. import util
 from .. import tag
 from ..nn import pad
-from ..nn.conv2d import conv2d
+from ..nn.conv2d import conv2d, _dilate_kernel
 from ..nn.util import get_pad_tuple
 
 ##### SCHEDULE UTILITIES #####
@@ -82,7 +82,7 @@ def const_array(data, name):
 
 
 @conv2d.register(["mali"])
-def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32'):
+def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32', dilation=1):
     """Conv2D operator for ARM Mali GPU backend.
 
     Parameters
@@ -102,6 +102,9 @@ def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
     layout : str
         layout of data
 
+    dilation : int or a list/tuple of two ints
+        dilation size, or [dilation_height, dilation_width]
+
     Returns
     -------
     output : tvm.Tensor
@@ -111,6 +114,8 @@ def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
     assert data.shape[0].value == 1, "only support batch size=1 convolution on mali"
     assert data.dtype == kernel.dtype, "Do not support inputs with different data types now."
 
+    # the schedules inline the dilate stage of the kernel
+    kernel = _dilate_kernel(kernel, dilation, layout)
     out_dtype = data.dtype
     HPAD, WPAD, _, _ = get_pad_tuple(padding, kernel)
     kernel_shape = util.get_const_tuple(kernel.shape)
@@ -57,6 +57,54 @@ def exp(x):
     return tvm.compute(x.shape, lambda *i: tvm.exp(x(*i)))
 
 
+def _fast_exp_float32(x):
+    """Approximate exp of a float32 expression.
+
+    exp(x) is computed as 2^n * exp(f) with n = round(x / ln2), where exp(f)
+    is a polynomial in f and 2^n is built from the exponent bits, so that
+    the result only consists of arithmetic llvm can vectorize.
+    """
+    x_hi = tvm.const(88.3762626647950, "float32")
+    x_lo = tvm.const(-88.3762626647949, "float32")
+    log2e = tvm.const(1.44269504088896341, "float32")
+    ln2 = tvm.const(0.6931471805599453, "float32")
+    p = [tvm.const(c, "float32") for c in (1.9875691500E-4, 1.3981999507E-3,
+                                           8.3334519073E-3, 4.1665795894E-2,
+                                           1.6666665459E-1, 5.0000001201E-1)]
+    one = tvm.const(1.0, "float32")
+    one_half = tvm.const(0.5, "float32")
+    bias = tvm.const(127.0, "float32")
+    # clamp x to the range where the result is representable
+    clamped = tvm.max(tvm.min(x, x_hi), x_lo)
+    # integer part
+    n = tvm.floor(clamped * log2e + one_half)
+    # fractional part
+    f = clamped - n * ln2
+    y = (((((p[0] * f + p[1]) * f + p[2]) * f + p[3]) * f + p[4]) * f + p[5]) * f * f + f + one
+    # 2^n
+    exponent = (n + bias).astype("int32") << tvm.const(23, "int32")
+    ef = tvm.call_pure_intrin("float32", "reinterpret", exponent)
+    return tvm.max(ef * y, x)
+
+
+@tvm.tag_scope(tag=tag.ELEMWISE)
+def fast_exp(x):
+    """Take exponential of input x using a fast polynomial approximation.
+
+    Parameters
+    ----------
+    x : tvm.Tensor
+        Input argument, only float32 is supported.
+
+    Returns
+    -------
+    y : tvm.Tensor
+        The result.
+    """
+    assert x.dtype == "float32", "fast_exp only supports float32"
+    return tvm.compute(x.shape, lambda *i: _fast_exp_float32(x(*i)))
+
+
 @tvm.tag_scope(tag=tag.ELEMWISE)
 def tanh(x):
     """Take hyperbolic tanh of input x.
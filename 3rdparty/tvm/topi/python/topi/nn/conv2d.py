@@ -4,6 +4,7 @@ from __future__ import absolute_import as _abs
 from collections import namedtuple
 import tvm
 from .pad import pad
+from .dilate import dilate
 from .util import get_pad_tuple
 from ..util import simplify
 
@@ -75,7 +76,7 @@ _WORKLOADS = [
 _CONV_SCHEDULE = {}
 
 @tvm.target.generic_func
-def conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype=None):
+def conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype=None, dilation=1):
     """Conv2D operator.
 
     Parameters
@@ -95,6 +96,9 @@ def conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype=None):
     layout : str
         layout of data
 
+    dilation : int or a list/tuple of two ints
+        dilation size, or [dilation_height, dilation_width]
+
     Returns
     -------
     output : tvm.Tensor
@@ -103,15 +107,50 @@ def conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype=None):
     # search platform specific declaration first
     # default declaration
     if layout == 'NCHW':
-        return conv2d_nchw(data, kernel, stride, padding, out_dtype)
+        return conv2d_nchw(data, kernel, stride, padding, out_dtype, dilation=dilation)
     elif layout == 'HWCN':
+        kernel = _dilate_kernel(kernel, dilation, layout)
         return conv2d_hwcn(data, kernel, stride, padding, out_dtype)
     elif layout == 'NHWC':
-        return conv2d_nhwc(data, kernel, stride, padding, out_dtype)
+        return conv2d_nhwc(data, kernel, stride, padding, out_dtype, dilation=dilation)
     else:
         raise ValueError("not support this layout {} yet".format(layout))
 
 
+def _dilate_kernel(kernel, dilation, layout):
+    """Dilate the kernel of a conv2d with zeros.
+
+    Used by declarations that cannot dilate on the fly; their schedules
+    inline the dilate stage into the convolution.
+
+    Parameters
+    ----------
+    kernel : tvm.Tensor
+        4-D kernel, [num_filter, in_channel, filter_height, filter_width] for
+        NCHW, [filter_height, filter_width, in_channel, num_filter] otherwise
+
+    dilation : int or a list/tuple of two ints
+        dilation size, or [dilation_height, dilation_width]
+
+    layout : str
+        layout of data
+
+    Returns
+    -------
+    kernel : tvm.Tensor
+        The dilated kernel, or the kernel itself when dilation is 1
+    """
+    if isinstance(dilation, int):
+        dilation_h = dilation_w = dilation
+    else:
+        dilation_h, dilation_w = dilation
+    if dilation_h == 1 and dilation_w == 1:
+        return kernel
+    if layout == 'NCHW':
+        return dilate(kernel, [1, 1, dilation_h, dilation_w])
+    return dilate(kernel, [dilation_h, dilation_w, 1, 1])
+
+
 @tvm.target.generic_func
 def conv2d_alter_layout(attrs, inputs, tinfos):
     """Change Conv2D layout.
@@ -286,7 +325,7 @@ def _im2col_pack(data, kernel, stride, padding, out_dtype=None):
     return output
 
 
-def conv2d_nchw(Input, Filter, stride, padding, out_dtype=None):
+def conv2d_nchw(Input, Filter, stride, padding, out_dtype=None, dilation=1):
     """Convolution operator in NCHW layout.
 
     Parameters
@@ -303,6 +342,9 @@ def conv2d_nchw(Input, Filter, stride, padding, out_dtype=None):
     padding : int or str
         Padding size, or ['VALID', 'SAME']
 
+    dilation : int or a list/tuple of two ints
+        Dilation size, or [dilation_height, dilation_width]
+
     Returns
     -------
     Output : tvm.Tensor
@@ -317,12 +359,19 @@ def conv2d_nchw(Input, Filter, stride, padding, out_dtype=None):
         stride_h = stride_w = stride
     else:
         stride_h, stride_w = stride
+    if isinstance(dilation, int):
+        dilation_h = dilation_w = dilation
+    else:
+        dilation_h, dilation_w = dilation
+    # the kernel is dilated on the fly in the reduction instead of being materialized
+    dilated_kernel_h = (kernel_h - 1) * dilation_h + 1
+    dilated_kernel_w = (kernel_w - 1) * dilation_w + 1
     pad_top, pad_left, pad_down, pad_right = get_pad_tuple(
-        padding, (kernel_h, kernel_w))
+        padding, (dilated_kernel_h, dilated_kernel_w))
     # compute the output shape
     out_channel = num_filter
-    out_height = simplify((in_height - kernel_h + pad_top + pad_down) // stride_h + 1)
-    out_width = simplify((in_width - kernel_w + pad_left + pad_right) // stride_w + 1)
+    out_height = simplify((in_height - dilated_kernel_h + pad_top + pad_down) // stride_h + 1)
+    out_width = simplify((in_width - dilated_kernel_w + pad_left + pad_right) // stride_w + 1)
     # compute graph
     pad_before = [0, 0, pad_top, pad_left]
     pad_after = [0, 0, pad_down, pad_right]
@@ -334,7 +383,8 @@ def conv2d_nchw(Input, Filter, stride, padding, out_dtype=None):
     return tvm.compute(
         (batch, out_channel, out_height, out_width),
         lambda nn, ff, yy, xx: tvm.sum(
-            temp[nn, rc, yy * stride_h + ry, xx * stride_w + rx].astype(out_dtype) *
+            temp[nn, rc, yy * stride_h + ry * dilation_h,
+                 xx * stride_w + rx * dilation_w].astype(out_dtype) *
             Filter[ff, rc, ry, rx].astype(out_dtype),
             axis=[rc, ry, rx]), tag="conv2d_nchw")
 
@@ -392,7 +442,7 @@ def conv2d_hwcn(Input, Filter, stride, padding, out_dtype=None):
     return Output
 
 
-def conv2d_nhwc(Input, Filter, stride, padding, out_dtype='float32'):
+def conv2d_nhwc(Input, Filter, stride, padding, out_dtype='float32', dilation=1):
     """Convolution operator in NHWC layout.
 
     Parameters
@@ -409,6 +459,9 @@ def conv2d_nhwc(Input, Filter, stride, padding, out_dtype='float32'):
     padding : int or str
         Padding size, or ['VALID', 'SAME']
 
+    dilation : int or a list/tuple of two ints
+        Dilation size, or [dilation_height, dilation_width]
+
     Returns
     -------
     output : tvm.Tensor
@@ -421,13 +474,19 @@ def conv2d_nhwc(Input, Filter, stride, padding, out_dtype='float32'):
         stride_h = stride_w = stride
     else:
         stride_h, stride_w = stride
+    if isinstance(dilation, int):
+        dilation_h = dilation_w = dilation
+    else:
+        dilation_h, dilation_w = dilation
+    dilated_kernel_h = (kernel_h - 1) * dilation_h + 1
+    dilated_kernel_w = (kernel_w - 1) * dilation_w + 1
 
     pad_top, pad_left, pad_down, pad_right = get_pad_tuple(
-        padding, (kernel_h, kernel_w))
+        padding, (dilated_kernel_h, dilated_kernel_w))
     # compute the output shape
     out_channel = num_filter
-    out_height = simplify((in_height - kernel_h + pad_top + pad_down) // stride_h + 1)
-    out_width = simplify((in_width - kernel_w + pad_left + pad_right) // stride_w + 1)
+    out_height = simplify((in_height - dilated_kernel_h + pad_top + pad_down) // stride_h + 1)
+    out_width = simplify((in_width - dilated_kernel_w + pad_left + pad_right) // stride_w + 1)
     pad_before = [0, pad_top, pad_left, 0]
     pad_after = [0, pad_down, pad_right, 0]
     PaddedInput = pad(Input, pad_before, pad_after, name="PaddedInput")
@@ -437,7 +496,8 @@ def conv2d_nhwc(Input, Filter, stride, padding, out_dtype='float32'):
     Output = tvm.compute(
         (batch, out_height, out_width, out_channel),
         lambda nn, yy, xx, ff: tvm.sum(
-            PaddedInput[nn, yy * stride_h + ry, xx * stride_w + rx, rc].astype(out_dtype) *
+            PaddedInput[nn, yy * stride_h + ry * dilation_h,
+                        xx * stride_w + rx * dilation_w, rc].astype(out_dtype) *
             Filter[ry, rx, rc, ff].astype(out_dtype), axis=[ry, rx, rc]),
         name="Conv2dOutput", tag="conv2d_nhwc")
     return Output
@@ -2,29 +2,15 @@
 """TVM operator for softmax and log_softmax compute."""
 from __future__ import absolute_import
 import tvm
+from ..math import _fast_exp_float32
 
-@tvm.tag_scope(tag='softmax_output')
-def softmax(x, axis=-1):
-    """Perform softmax activation on the data
-
-    Parameters
-    ----------
-    data : tvm.Tensor
-        can be any dimension
-
-    axis : int
-        channel axis
-
-    Returns
-    -------
-    output : tvm.Tensor
-        output shape is the same as input
-    """
+def _softmax(x, axis, exp_fn):
+    """Softmax along axis, with exp_fn computing the exponentials"""
     shape = x.shape
     if axis < 0:
         axis = len(shape) + axis
     if axis >= len(shape):
-        ValueError("axis parameter should be less than input dim")
+        raise ValueError("axis parameter should be less than input dim")
 
     k1 = tvm.reduce_axis((0, shape[axis]), name='k')
     k2 = tvm.reduce_axis((0, shape[axis]), name='k')
@@ -38,11 +24,11 @@ def softmax(x, axis=-1):
 
     def _compute_expsum(max_elem, *indices):
         eval_range = insert_reduce_index(indices, k2)
-        return tvm.sum(tvm.exp(x[eval_range] - max_elem[indices]), axis=k2)
+        return tvm.sum(exp_fn(x[eval_range] - max_elem[indices]), axis=k2)
 
     def _normalize(max_elem, expsum, *indices):
         non_reduce_indices = tuple([var for (i, var) in enumerate(indices) if i != axis])
-        return tvm.exp(x[indices] - max_elem[non_reduce_indices]) / expsum[non_reduce_indices]
+        return exp_fn(x[indices] - max_elem[non_reduce_indices]) / expsum[non_reduce_indices]
 
     reduced_shape = tuple([dim for (i, dim) in enumerate(shape) if i != axis])
     max_elem = tvm.compute(reduced_shape, _compute_max)
@@ -50,6 +36,49 @@ def softmax(x, axis=-1):
     return tvm.compute(shape, lambda *indices: _normalize(max_elem, expsum, *indices))
 
 
+@tvm.tag_scope(tag='softmax_output')
+def softmax(x, axis=-1):
+    """Perform softmax activation on the data
+
+    Parameters
+    ----------
+    data : tvm.Tensor
+        can be any dimension
+
+    axis : int
+        channel axis
+
+    Returns
+    -------
+    output : tvm.Tensor
+        output shape is the same as input
+    """
+    return _softmax(x, axis, tvm.exp)
+
+
+@tvm.tag_scope(tag='softmax_output')
+def fast_softmax(x, axis=-1):
+    """Perform softmax activation on the data, using fast_exp for the exponentials
+
+    The stages are the same as :any:`softmax`, so it shares the softmax schedules.
+
+    Parameters
+    ----------
+    data : tvm.Tensor
+        can be any dimension, only float32 is supported
+
+    axis : int
+        channel axis
+
+    Returns
+    -------
+    output : tvm.Tensor
+        output shape is the same as input
+    """
+    assert x.dtype == "float32", "fast_softmax only supports float32"
+    return _softmax(x, axis, _fast_exp_float32)
+
+
 @tvm.tag_scope(tag='log_softmax_output')
 def log_softmax(x):
     """Perform log softmax activation on the data
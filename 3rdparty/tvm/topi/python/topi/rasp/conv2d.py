@@ -7,7 +7,7 @@ from .. import tag
 from ..nn.conv2d import conv2d as _conv2d, _get_schedule
 from ..nn.conv2d import SpatialPack, Im2ColPack
 from ..nn.conv2d import _WORKLOADS, _SCH_TO_DECL_FUNC
-from ..nn.conv2d import _get_workload
+from ..nn.conv2d import _get_workload, _dilate_kernel
 from ..nn.util import infer_pad, infer_stride
 from .. import generic
 
@@ -75,11 +75,13 @@ def _get_schedule_conv2d(wkl):
 
 
 @_conv2d.register("rasp")
-def _declaration_conv2d(data, kernel, stride, padding, layout, out_dtype):
+def _declaration_conv2d(data, kernel, stride, padding, layout, out_dtype, dilation=1):
     if out_dtype is None:
         out_dtype = data.dtype
     assert layout == 'NCHW', "only support NCHW convolution on rasp"
     assert data.shape[0].value == 1, "only support batch size=1 convolution on rasp"
+    # the schedules inline the dilate stage of the kernel
+    kernel = _dilate_kernel(kernel, dilation, layout)
     wkl = _get_workload(data, kernel, stride, padding, out_dtype)
     sch = _get_schedule(wkl)
     return _SCH_TO_DECL_FUNC[type(sch)](data, kernel, stride, padding, out_dtype)
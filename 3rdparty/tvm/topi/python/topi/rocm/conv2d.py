@@ -9,7 +9,7 @@ from ..util import get_const_int
 
 
 @conv2d.register("rocm")
-def conv2d_rocm(data, kernel, stride, padding, layout='NCHW', out_dtype='float32'):
+def conv2d_rocm(data, kernel, stride, padding, layout='NCHW', out_dtype='float32', dilation=1):
     """Conv2D operator for rocm backend.
 
     Parameters
@@ -29,6 +29,9 @@ def conv2d_rocm(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
     layout : str
         layout of data
 
+    dilation : int or a list/tuple of two ints
+        dilation size, or [dilation_height, dilation_width]
+
     Returns
     -------
     output : tvm.Tensor
@@ -45,9 +48,13 @@ def conv2d_rocm(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
     else:
         pad_h, pad_w = padding
     # handle dilation
-    dilation_h = dilation_w = 1
+    if isinstance(dilation, int):
+        dilation_h = dilation_w = dilation
+    else:
+        dilation_h, dilation_w = dilation
     kernel_tvm = kernel
     kernel_cudnn = kernel
+    # a kernel dilated by the caller carries the dilation in its dilate stage
     if isinstance(kernel.op, tvm.tensor.ComputeOp) and "dilate" in kernel.op.tag:
         kernel_before_dilation = kernel.op.input_tensors[0]
         kernel_cudnn = kernel_before_dilation
@@ -66,7 +73,8 @@ def conv2d_rocm(data, kernel, stride, padding, layout='NCHW', out_dtype='float32
                                      dilation_h,
                                      dilation_w,
                                      conv_mode=0)
-    return topi.nn.conv2d_nchw(data, kernel_tvm, stride, padding, out_dtype)
+    return topi.nn.conv2d_nchw(data, kernel_tvm, stride, padding, out_dtype,
+                               dilation=dilation)
 
 
 @generic.schedule_conv2d_nchw.register(["rocm"])
@@ -5,7 +5,7 @@ from .. import generic, tag
 from .. import nn
 from ..nn.util import infer_pad, infer_stride
 from ..nn.conv2d import conv2d, conv2d_NCHWc, conv2d_alter_layout, \
-                        _get_workload, _get_schedule, Workload
+                        _get_workload, _get_schedule, _dilate_kernel, Workload
 
 from . import conv2d_avx_1x1, conv2d_avx_common
 from .conv2d_avx_common import AVXConvCommonFwd
@@ -100,24 +100,39 @@ def _get_schedule_conv(wkl):
     return sch
 
 
+def _get_packed_schedule(sch, ic_bn, oc_bn):
+    """Adapt a schedule to a workload whose data and kernel are already packed.
+
+    The packing of the input tensors is decided upstream (e.g. by the layout
+    alteration), so its block factors take precedence over the ones in the
+    schedule table.
+    """
+    if (sch.ic_bn, sch.oc_bn) != (ic_bn, oc_bn):
+        sch = sch._replace(ic_bn=ic_bn, oc_bn=oc_bn)
+    return sch
+
+
 @conv2d.register("cpu")
-def _declaration_conv(data, kernel, stride, padding, layout, out_dtype):
+def _declaration_conv(data, kernel, stride, padding, layout, out_dtype, dilation=1):
     _AVX_SCH_TO_DECL_FUNC = {
         AVXConvCommonFwd: conv2d_avx_common._declaration_conv,
         AVXConv1x1Fwd: conv2d_avx_1x1._declaration_conv
     }
     out_dtype = data.dtype if out_dtype is None else out_dtype
     target = tvm.target.current_target(allow_none=False)
-    wkl = _get_workload(data, kernel, stride, padding, out_dtype)
     if 'avx' in str(target) and layout == 'NCHW':
+        # the AVX templates take the kernel as it is, so dilate it beforehand
+        kernel = _dilate_kernel(kernel, dilation, layout)
+        wkl = _get_workload(data, kernel, stride, padding, out_dtype)
         sch = _get_schedule(wkl)
         return _AVX_SCH_TO_DECL_FUNC[type(sch)](data, kernel, stride, padding, layout, out_dtype)
     elif layout == 'NCHW':
-        return nn.conv2d_nchw(data, kernel, stride, padding, out_dtype)
+        return nn.conv2d_nchw(data, kernel, stride, padding, out_dtype, dilation=dilation)
     elif layout == 'HWCN':
+        kernel = _dilate_kernel(kernel, dilation, layout)
         return nn.conv2d_hwcn(data, kernel, stride, padding, out_dtype)
     elif layout == 'NHWC':
-        return nn.conv2d_nhwc(data, kernel, stride, padding, out_dtype)
+        return nn.conv2d_nhwc(data, kernel, stride, padding, out_dtype, dilation=dilation)
     else:
         raise ValueError("not support this layout {} yet".format(layout))
 
@@ -127,9 +142,11 @@ def _alter_conv2d_layout(attrs, inputs, tinfos):
     import nnvm.symbol as sym
     copy_inputs = [s for s in inputs]
     new_attrs = {k : attrs[k] for k in attrs.keys()}
-    # only optimize for NCHW, groups=1 conv
+    # only optimize for NCHW, groups=1, non-dilated conv
     if attrs['layout'] != 'NCHW' or attrs.get_int("groups") != 1:
         return None
+    if attrs.get_int_tuple("dilation") != (1, 1):
+        return None
 
     data = tinfos[0]
     kernel = tinfos[1]
@@ -169,6 +186,9 @@ def _declaration_conv_NCHWc(data, kernel, num_filter, kernel_size, stride, paddi
                         tvm.placeholder((num_filter, ic, kh, kw), dtype=out_dtype),
                         stride, padding, out_dtype)
     sch = _get_schedule(wkl)
+    # kernel is packed as (OC, IC, ic, oc, h, w) for 1x1, (OC, IC, h, w, ic, oc) otherwise
+    oc_block = kernel.shape[3] if isinstance(sch, AVXConv1x1Fwd) else kernel.shape[5]
+    sch = _get_packed_schedule(sch, ic_block, oc_block.value)
     return _AVX_SCH_TO_DECL_FUNC[type(sch)](wkl, sch, data, kernel)
 
 
@@ -348,7 +368,7 @@ def schedule_conv2d_NCHWc(num_filter, kernel_size, stride, padding, outs):
             original_kernel = tvm.placeholder((num_filter, ic, kh, kw), dtype=conv_out.dtype)
 
             wkl = _get_workload(original_data, original_kernel, stride, padding, conv_out.dtype)
-            sch = _get_schedule(wkl)
+            sch = _get_packed_schedule(_get_schedule(wkl), ic_block, conv_out.shape[4].value)
             _AVX_SCH_TO_SCH_FUNC[type(sch)](s, wkl, sch, data_vec,
                                             kernel, conv_out, outs[0])
 
@@ -53,6 +53,33 @@ def test_ewise():
     test_apply(topi.log, "log", np.log, 0, 100)
     test_apply(topi.sqrt, "sqrt", np.sqrt, 0, 100)
 
+
+def test_fast_exp():
+    A = tvm.placeholder((20, 3), name='A')
+    B = topi.fast_exp(A)
+    assert tuple(B.shape) == tuple(A.shape)
+    a_np = np.random.uniform(low=-20, high=20, size=(20, 3)).astype(A.dtype)
+    b_np = np.exp(a_np)
+
+    def check_device(device):
+        ctx = tvm.context(device, 0)
+        if not ctx.exist:
+            print("Skip because %s is not enabled" % device)
+            return
+        print("Running on target: %s" % device)
+        with tvm.target.create(device):
+            s = topi.generic.schedule_injective(B)
+        foo = tvm.build(s, [A, B], device, name="fast_exp")
+        a = tvm.nd.array(a_np, ctx)
+        b = tvm.nd.array(np.zeros_like(b_np), ctx)
+        foo(a, b)
+        np.testing.assert_allclose(b.asnumpy(), b_np, rtol=1e-5, atol=1e-5)
+
+    # the reinterpret intrinsic is only lowered by llvm
+    check_device('llvm')
+
+
 if __name__ == "__main__":
     test_util()
     test_ewise()
+    test_fast_exp()
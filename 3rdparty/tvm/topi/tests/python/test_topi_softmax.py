@@ -7,9 +7,10 @@ import topi.testing
 import logging
 from topi.util import get_const_tuple
 
-def verify_softmax(m, n):
+def verify_softmax(m, n, softmax=topi.nn.softmax,
+                   devices=('cuda', 'opencl', 'metal', 'rocm', 'vulkan')):
     A = tvm.placeholder((m, n), name='A')
-    B = topi.nn.softmax(A)
+    B = softmax(A)
     # confirm lower works
     s = tvm.create_schedule([B.op])
     tvm.lower(s, [A, B], simple_mode=True)
@@ -32,7 +33,7 @@ def verify_softmax(m, n):
         foo(a, b)
         np.testing.assert_allclose(b.asnumpy(), b_np, rtol=1e-5)
 
-    for device in ['cuda', 'opencl', 'metal', 'rocm', 'vulkan']:
+    for device in devices:
         check_device(device)
 
 def test_softmax():
@@ -40,6 +41,12 @@ def test_softmax():
     verify_softmax(3, 4)
 
 
+def test_fast_softmax():
+    # the reinterpret intrinsic of fast_exp is only lowered by llvm
+    verify_softmax(32, 10, topi.nn.fast_softmax, ["llvm"])
+    verify_softmax(3, 4, topi.nn.fast_softmax, ["llvm"])
+
+
 def verify_log_softmax(m, n):
     A = tvm.placeholder((m, n), name='A')
     B = topi.nn.log_softmax(A)
@@ -74,4 +81,5 @@ def test_log_softmax():
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
     test_softmax()
+    test_fast_softmax()
     test_log_softmax()